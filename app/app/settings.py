@@ -78,17 +78,43 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.1/ref/settings/#databases
 
+# In docker-compose DB_HOST/DB_PORT point at pgbouncer, which pools the
+# postgres connections in transaction mode, so a request reuses an open
+# server connection instead of postgres forking a new backend for it.
+# Transaction pooling hands each transaction to whichever server connection
+# is free, so nothing may rely on session state (LISTEN/NOTIFY, session SET,
+# advisory locks, server side cursors).
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
+        'PORT': os.environ.get('DB_PORT', ''),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        # pgbouncer keeps the connections open, so django doesn't need to
+        'CONN_MAX_AGE': 0,
+        # named cursors only live as long as their session, which
+        # transaction pooling doesn't guarantee
+        'DISABLE_SERVER_SIDE_CURSORS': True,
     }
 }
 
 
+# Password hashing
+# https://docs.djangoproject.com/en/2.1/topics/auth/passwords/
+
+# hash new passwords with argon2, which takes a couple of milliseconds per
+# password instead of the ~50ms of the default PBKDF2, while still being
+# memory hard. the others are kept so existing passwords still check out,
+# and are upgraded to argon2 on the user's next login
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
 
@@ -0,0 +1,63 @@
+"""
+Django settings for running the test suite.
+
+Used with `python manage.py test --settings=app.settings_test`, everything
+not overridden here comes from the regular settings.
+"""
+
+import os
+
+from app.settings import *  # noqa: F401,F403
+
+
+# Password hashing
+# PBKDF2 is deliberately slow, and the tests create users all the time, so
+# use the fast (and insecure, which is fine for throwaway test users) hasher.
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+
+# Migrations
+# the test database doesn't need the history of the schema, only the schema
+# itself, so have django create the tables straight from the models instead
+# of replaying every migration whenever the test database is created. add
+# --keepdb to keep the test database around between runs as well.
+class DisableMigrations:
+
+    def __contains__(self, app_label):
+        return True
+
+    def __getitem__(self, app_label):
+        # None tells django the app has no migrations
+        return None
+
+
+MIGRATION_MODULES = DisableMigrations()
+
+
+# Database
+# keep testing against postgres, like production, the tests rely on it
+# (bulk_create only hands back the new ids on postgres), but don't make every
+# commit wait for the WAL to be flushed to disk, a crash can only cost us
+# throwaway test data.
+# the app itself goes through pgbouncer (DB_HOST), which can't be used here:
+# it rejects the options startup parameter, and the test runner has to
+# create and drop its own database. so talk to postgres directly, the db
+# service in docker-compose unless TEST_DB_HOST and TEST_DB_PORT say otherwise
+DATABASES['default'] = dict(  # noqa: F405
+    DATABASES['default'],  # noqa: F405
+    HOST=os.environ.get('TEST_DB_HOST', 'db'),
+    PORT=os.environ.get('TEST_DB_PORT', '5432'),
+    OPTIONS={'options': '-c synchronous_commit=off'},
+)
+
+
+# Django REST framework
+# the tests only ever read the json, so leave out the browsable api renderer
+# (and the template machinery it pulls in)
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': (
+        'rest_framework.renderers.JSONRenderer',
+    ),
+}
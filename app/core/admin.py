@@ -1,3 +1,4 @@
+from django import forms
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext as _
@@ -25,8 +26,34 @@ class UserAdmin(BaseUserAdmin):
     )
 
 
+class RecipeAdminForm(forms.ModelForm):
+    # edit the price in dollars, like the api, rather than the cents the
+    # recipe is stored with
+    price = forms.DecimalField(max_digits=5, decimal_places=2, min_value=0)
+
+    class Meta:
+        model = models.Recipe
+        exclude = ('price_cents',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.price_cents is not None:
+            self.initial.setdefault('price', self.instance.price)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if 'price' in cleaned_data:
+            self.instance.price = cleaned_data['price']
+        return cleaned_data
+
+
+class RecipeAdmin(admin.ModelAdmin):
+    form = RecipeAdminForm
+    list_display = ['title', 'user', 'price']
+
+
 admin.site.register(models.User, UserAdmin)
 # using default model for Tag, Ingredient
 admin.site.register(models.Tag)
 admin.site.register(models.Ingredient)
-admin.site.register(models.Recipe)
+admin.site.register(models.Recipe, RecipeAdmin)
@@ -1,14 +1,151 @@
+import asyncio
+import socket
+import threading
 import time
 
+from psycopg2 import OperationalError as Psycopg2OpError
 from django.db import connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 
 class Command(BaseCommand):
     '''
     Django command to pause execution until database is available
     '''
+    # seconds to wait after the first failed probe, doubled after every
+    # failure after that, but never waiting longer than backoff_max
+    backoff_base = 0.1
+    backoff_max = 5.0
+    # seconds a single tcp connect to the database port may take
+    connect_timeout = 1.0
+
+    def add_arguments(self, parser):
+        '''
+        Limit how long we keep waiting for the database
+        '''
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=90,
+            help='Give up after waiting this many seconds (default 90).',
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=None,
+            help='Give up after this many failed connection attempts.',
+        )
+
+    def _port_open(self, settings_dict):
+        '''
+        Check if anything is listening on the database host and port
+        '''
+        host = settings_dict['HOST']
+        # no host (or a socket directory) means a unix socket, there is no
+        # tcp port to check, so leave it to the real connection
+        if not host or host.startswith('/'):
+            return True
+        port = int(settings_dict['PORT'] or 5432)
+        try:
+            socket.create_connection(
+                (host, port),
+                timeout=self.connect_timeout
+            ).close()
+        except OSError:
+            return False
+        return True
+
+    def _probe(self, conn):
+        '''
+        Return True once the database accepts connections
+        '''
+        # a bare tcp connect is a lot cheaper than logging in to postgres,
+        # so don't attempt the login until the port is accepting connections
+        if not self._port_open(conn.settings_dict):
+            return False
+        try:
+            # indexing connections only hands back a lazy wrapper, so we
+            # have to ask it to actually open the connection, which is
+            # what raises the OperationalError while the db is down
+            conn.ensure_connection()
+        except (OperationalError, Psycopg2OpError):
+            return False
+        return True
+
+    def _sleep(self, seconds):
+        '''
+        Wait between probes, waking up early if another database gave up
+        '''
+        # the tests patch this, so they never wait
+        self._stop.wait(seconds)
+
+    def _wait_for(self, alias, timeout, max_attempts):
+        '''
+        Block until the database behind alias accepts connections
+        '''
+        # monotonic, so a clock jump while we wait can't end the wait early
+        # or keep us waiting forever
+        start = time.monotonic()
+        # django connections are per thread, so this is this thread's own
+        # connection to the database, which we close again once it's up
+        conn = connections[alias]
+        attempt = 0
+        # stop probing as soon as another database has given up, the
+        # command is going to fail anyway
+        while not self._stop.is_set() and not self._probe(conn):
+            # raise instead of hanging, so a misconfigured db fails the
+            # container start with a clear error
+            if max_attempts and attempt + 1 >= max_attempts:
+                raise CommandError(
+                    f'Database {alias!r} unavailable after '
+                    f'{attempt + 1} attempts'
+                )
+            if time.monotonic() - start >= timeout:
+                raise CommandError(
+                    f'Database {alias!r} unavailable after {timeout:g} seconds'
+                )
+            # back off exponentially, so a db that comes up quickly is
+            # picked up quickly, and a long outage isn't probed constantly
+            wait = min(
+                self.backoff_base * (2 ** attempt),
+                self.backoff_max
+            )
+            attempt += 1
+            self.stdout.write(
+                f'Database {alias!r} not ready, wait for {wait:g} seconds...'
+            )
+            self._sleep(wait)
+        conn.close()
+
+    async def _wait_for_all(self, aliases, timeout, max_attempts):
+        '''
+        Wait for all of the databases at the same time
+        '''
+        # probing blocks on sockets and the db driver, so give every database
+        # its own thread. the total wait is then the slowest database, not
+        # the sum of all of them, and the first one to give up raises
+        self._stop = threading.Event()
+        loop = asyncio.get_event_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(
+                None, self._wait_or_stop, alias, timeout, max_attempts
+            )
+            for alias in aliases
+        ))
+
+    def _wait_or_stop(self, alias, timeout, max_attempts):
+        '''
+        Wait for one database, telling the others to stop if it gives up
+        '''
+        # gather raises the first error straight away, but it can't stop the
+        # other threads, and the command doesn't exit until they are done
+        try:
+            self._wait_for(alias, timeout, max_attempts)
+        except BaseException:
+            self._stop.set()
+            raise
+
     # we are going to put the function in a handle function
     # a handle function is what is ran whenever we run this managament Command
     def handle(self, *args, **options):
@@ -17,12 +154,12 @@ class Command(BaseCommand):
         we are going to clean and exit
         '''
         self.stdout.write('Waiting for database...')
-        db_conn = None
-        while not db_conn:
-            try:
-                db_conn = connections['default']
-            except OperationalError:
-                self.stdout.write('Database not ready, wait for 1 second...')
-                time.sleep(1)
+        # every configured database, e.g. default plus any read replicas
+        aliases = list(connections)
+        asyncio.run(self._wait_for_all(
+            aliases,
+            options['timeout'],
+            options['max_attempts']
+        ))
 
         self.stdout.write(self.style.SUCCESS('The Database is ready!'))
@@ -0,0 +1,34 @@
+# Generated by Django 2.1.15 on 2026-10-15 03:10
+
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def lowercase_emails(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    # emails that only differ by case would end up the same, and break the
+    # unique constraint half way through the update, so check for them first
+    clashes = list(
+        User.objects.values(lower_email=Lower('email')).annotate(
+            users=Count('id')
+        ).filter(users__gt=1).values_list('lower_email', flat=True)
+    )
+    if clashes:
+        raise RuntimeError(
+            'Some emails are used by more than one user when case is '
+            'ignored: {}. Merge or rename those users, then run this '
+            'migration again.'.format(', '.join(sorted(clashes)))
+        )
+    User.objects.update(email=Lower('email'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_recipe_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+    ]
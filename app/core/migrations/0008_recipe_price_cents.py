@@ -0,0 +1,56 @@
+# Generated by Django 2.1.15 on 2026-10-15 03:25
+
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F, Value
+from django.db.models.functions import Cast
+
+
+def price_to_cents(apps, schema_editor):
+    Recipe = apps.get_model('core', 'Recipe')
+    Recipe.objects.update(price_cents=ExpressionWrapper(
+        F('price') * Value(100),
+        output_field=models.PositiveIntegerField()
+    ))
+
+
+def cents_to_price(apps, schema_editor):
+    Recipe = apps.get_model('core', 'Recipe')
+    # cents need two more digits than the dollar price they turn into
+    cents = models.DecimalField(max_digits=7, decimal_places=2)
+    Recipe.objects.update(price=ExpressionWrapper(
+        Cast('price_cents', cents) / Value(100),
+        output_field=models.DecimalField(max_digits=5, decimal_places=2)
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_tag_ingredient_user_name_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='price_cents',
+            field=models.PositiveIntegerField(default=0),
+            preserve_default=False,
+        ),
+        # let price be empty while the migration is reversed, until
+        # cents_to_price has filled it back in
+        migrations.AlterField(
+            model_name='recipe',
+            name='price',
+            field=models.DecimalField(decimal_places=2, max_digits=5, null=True),
+        ),
+        migrations.RunPython(price_to_cents, cents_to_price),
+        migrations.RemoveField(
+            model_name='recipe',
+            name='price',
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='link',
+            field=models.URLField(blank=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.1.15 on 2026-10-15 03:35
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_tag_ingredient_covering_index'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='recipe',
+            options={'ordering': ['-id']},
+        ),
+    ]
@@ -1,59 +1,82 @@
 import uuid
-import os
+from decimal import Decimal, ROUND_HALF_UP
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, \
                                         PermissionsMixin
 from django.conf import settings
 
 
+# where uploaded recipe images are stored, relative to MEDIA_ROOT
+_UPLOAD_PREFIX = 'uploads/recipe/'
+
+
 def recipe_image_filepath(instance, filename):
     '''
     generate file path for new recipe image
     '''
-    # strip the extention part of the filename (everything after last dot)
-    # slice the list and return the last item, so this will return the
-    # extension of the file name
-    extension = filename.split('.')[-1]
-    # now make the file name using the f string feature
-    # so this creates a function with the NEW uuid (uuid.uuid4 function) and
-    # then keeps the extension of the file that was passed in.
-    filename = f'{uuid.uuid4()}.{extension}'
-    # now 'join' this up the to the desitination path we want to store the file
-    return os.path.join('uploads/recipe/', filename)
+    # strip the extention part of the filename (everything after last dot).
+    # rpartition splits on the last dot only, and if there is no dot at all
+    # the separator comes back empty, so fall back to a generic extension
+    _, dot, extension = filename.rpartition('.')
+    if not dot or not extension:
+        extension = 'bin'
+    # now make the file name using the f string feature with the NEW uuid
+    # (uuid.uuid4 function), keeping the extension of the file that was
+    # passed in. .hex is the uuid without dashes, so no str() formatting,
+    # and the destination path is a fixed prefix, so no os.path.join
+    return f'{_UPLOAD_PREFIX}{uuid.uuid4().hex}.{extension}'
 
 
 class UserManager(BaseUserManager):
 
-        def create_user(self, email, password=None, **extra_fields):
-            '''
-            Creates and saves a new user
-            '''
-            # this is the statement that raises valueerror for the
-            # test_new_user_invalid_email func in test_models
-            if not email:
-                raise ValueError('Users must have an email address')
-            # normalizemail is a helperfunction that comes with BaseUserManager
-            user = \
-                self.model(email=self.normalize_email(email), **extra_fields)
-            # use the setpassword helper function to encrypt the password
-            user.set_password(password)
-            # using=self._db supports multiple databases
-            user.save(using=self._db)
-
-            return user
-
-        def create_superuser(self, email, password):
-            '''
-            Creates and saves a new superuser
-            '''
-            # use our create_user func we made above, no need to type again
-            user = self.create_user(email, password)
-            user.is_staff = True
-            user.is_superuser = True
-            # because we modified the user we need to save it below
-            user.save(using=self._db)
-
-            return user
+    @classmethod
+    def normalize_email(cls, email):
+        '''
+        Lowercase the whole email, not just the domain part
+        '''
+        # storing emails lowercased means the unique index on email
+        # answers every lookup, instead of needing a case insensitive
+        # (and unindexed) UPPER(email) comparison
+        return super().normalize_email(email).lower()
+
+    def get_by_natural_key(self, username):
+        '''
+        Look up a user by email, regardless of the case it was typed in
+        '''
+        return self.get(**{
+            self.model.USERNAME_FIELD: self.normalize_email(username)
+        })
+
+    def create_user(self, email, password=None, **extra_fields):
+        '''
+        Creates and saves a new user
+        '''
+        # this is the statement that raises valueerror for the
+        # test_new_user_invalid_email func in test_models
+        if not email:
+            raise ValueError('Users must have an email address')
+        # normalizemail is a helperfunction that comes with BaseUserManager
+        user = self.model(email=self.normalize_email(email), **extra_fields)
+        # use the setpassword helper function to encrypt the password
+        user.set_password(password)
+        # using=self._db supports multiple databases
+        user.save(using=self._db)
+
+        return user
+
+    def create_superuser(self, email, password):
+        '''
+        Creates and saves a new superuser
+        '''
+        # use our create_user func we made above, no need to type again.
+        # pass the flags through so they are set before the one and only
+        # save, instead of saving the user a second time to change them
+        return self.create_user(
+            email,
+            password,
+            is_staff=True,
+            is_superuser=True
+        )
 
 
 class User(AbstractBaseUser, PermissionsMixin):
@@ -69,6 +92,33 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     USERNAME_FIELD = 'email'
 
+    def clean(self):
+        '''
+        Normalize the email before the form checks it is unique
+        '''
+        super().clean()
+        self.email = type(self).objects.normalize_email(self.email)
+
+    def save(self, *args, **kwargs):
+        '''
+        Store the email normalized, however the user was created
+        '''
+        # the admin forms and plain saves don't go through create_user, and
+        # logging in only looks up the lowercased email
+        self.email = type(self).objects.normalize_email(self.email)
+        super().save(*args, **kwargs)
+
+
+class UserScopedManager(models.Manager):
+
+    def for_user(self, user):
+        '''
+        Return the objects owned by user
+        '''
+        # compare the column to the user's id directly, instead of having
+        # django work the id out of the user object
+        return self.get_queryset().filter(user_id=user.pk)
+
 
 class Tag(models.Model):
     '''
@@ -80,6 +130,15 @@ class Tag(models.Model):
         on_delete=models.CASCADE,
     )
 
+    objects = UserScopedManager()
+
+    class Meta:
+        # tags are always listed per user and sorted by name, so let the
+        # index hand them back already filtered and in order (postgres reads
+        # it backwards for the -name ordering). the id on the end covers the
+        # id and name the list loads, so it never has to visit the table
+        indexes = [models.Index(fields=['user', 'name', 'id'])]
+
     def __str__(self):
         '''
         Add string representation of the model
@@ -97,10 +156,34 @@ class Ingredient(models.Model):
         on_delete=models.CASCADE
     )
 
+    objects = UserScopedManager()
+
+    class Meta:
+        # same as for tags
+        indexes = [models.Index(fields=['user', 'name', 'id'])]
+
     def __str__(self):
         return self.name
 
 
+class RecipeManager(UserScopedManager):
+
+    def get_queryset(self):
+        '''
+        Fetch the tags and ingredients of all recipes in one query each
+        '''
+        # every recipe is serialized along with its tags and ingredients, so
+        # prefetch them, instead of running two queries per recipe. the
+        # serializers only ever show their id and name, so skip the rest
+        return super().get_queryset().prefetch_related(
+            models.Prefetch(
+                'ingredients',
+                queryset=Ingredient.objects.only('id', 'name')
+            ),
+            models.Prefetch('tags', queryset=Tag.objects.only('id', 'name')),
+        )
+
+
 class Recipe(models.Model):
     '''
     Recipe object
@@ -111,12 +194,41 @@ class Recipe(models.Model):
     )
     title = models.CharField(max_length=255)
     time_minutes = models.IntegerField()
-    price = models.DecimalField(max_digits=5, decimal_places=2)
-    link = models.CharField(max_length=255, blank=True)
+    # store the price as a whole number of cents, the price property below
+    # turns it into dollars
+    price_cents = models.PositiveIntegerField()
+    link = models.URLField(max_length=255, blank=True)
     # provide name of the class in a string
     ingredients = models.ManyToManyField('Ingredient')
     tags = models.ManyToManyField('Tag')
     image = models.ImageField(null=True, upload_to=recipe_image_filepath)
 
+    objects = RecipeManager()
+
+    class Meta:
+        # newest first, so lists come back in the same order every time
+        ordering = ['-id']
+        # the recipes are always looked up per user, newest first, so let
+        # one index do both (postgres reads it backwards for the -id). the
+        # tag and ingredient filters join from these ids to the m2m tables,
+        # which django already indexes on both of their columns
+        indexes = [models.Index(fields=['user', 'id'])]
+
+    @property
+    def price(self):
+        '''
+        Price of the recipe in dollars
+        '''
+        # a Decimal, like a DecimalField would give, a float can't hold
+        # most prices exactly
+        return Decimal(self.price_cents).scaleb(-2)
+
+    @price.setter
+    def price(self, value):
+        # go through str() so a float is read as it prints, 19.99 rather
+        # than 19.989999..., then round to the nearest cent
+        value = Decimal(str(value)).quantize(Decimal('0.01'), ROUND_HALF_UP)
+        self.price_cents = int(value.scaleb(2))
+
     def __str__(self):
         return self.title
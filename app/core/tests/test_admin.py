@@ -1,25 +1,36 @@
-from django.test import TestCase, Client
+import io
+
+from PIL import Image
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, Client, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
+from core.models import Recipe, Tag, Ingredient
+
 
 class AdminSiteTests(TestCase):
 
-    def setUp(self):
-        self.client = Client()
-        self.admin_user = get_user_model().objects.create_superuser(
+    # the users are only read by the tests, so create them once for the
+    # whole class instead of hashing both passwords again for every test
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = get_user_model().objects.create_superuser(
             email='admin@admin.com',
             password='password123',
         )
-        # client helper function allows us to log a user in with
-        # the django auth
-        self.client.force_login(self.admin_user)
-        self.user = get_user_model().objects.create_user(
+        cls.user = get_user_model().objects.create_user(
             email='test@test.com',
             password='password123',
             name='Test user full name'
         )
 
+    def setUp(self):
+        self.client = Client()
+        # client helper function allows us to log a user in with
+        # the django auth
+        self.client.force_login(self.admin_user)
+
     def test_users_listed(self):
         '''
         Test that users are listed on user page
@@ -53,3 +64,43 @@ class AdminSiteTests(TestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, 200)
+
+    # the form needs an image, keep it in memory instead of MEDIA_ROOT
+    @override_settings(
+        DEFAULT_FILE_STORAGE='recipe.tests.storage.InMemoryStorage'
+    )
+    def test_recipe_change_page_price(self):
+        '''
+        Test the recipe edit page shows and saves the price in dollars
+        '''
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Steak and mushroom sauce',
+            time_minutes=5,
+            price='5.00'
+        )
+        url = reverse('admin:core_recipe_change', args=[recipe.id])
+        response = self.client.get(url)
+
+        self.assertContains(response, 'name="price" value="5.00"')
+        self.assertNotContains(response, 'name="price_cents"')
+
+        image_file = io.BytesIO()
+        Image.new('RGB', (10, 10)).save(image_file, format='JPEG')
+        response = self.client.post(url, {
+            'user': self.user.id,
+            'title': recipe.title,
+            'time_minutes': 5,
+            'price': '7.25',
+            'link': '',
+            'tags': [Tag.objects.create(user=self.user, name='Dinner').id],
+            'ingredients': [
+                Ingredient.objects.create(user=self.user, name='Steak').id
+            ],
+            'image': SimpleUploadedFile(
+                'image.jpg', image_file.getvalue(), 'image/jpeg'
+            ),
+        })
+        self.assertEqual(response.status_code, 302)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.price_cents, 725)
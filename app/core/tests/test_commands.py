@@ -1,13 +1,25 @@
+import asyncio
+import threading
+
 # allows us to mock the behavior of the django get database function
 # simulates the db being available when we test our command
-from unittest.mock import patch
+from unittest.mock import MagicMock, call, patch
 # allows us to call the command in our source code
 from django.core.management import call_command
+from django.core.management.base import CommandError
 # import the operational error that django throws when the db is unavailable
 # and we will simulate the db being available or not when we run the command
 from django.db.utils import OperationalError
 from django.test import TestCase
 
+from core.management.commands.wait_for_db import Command
+
+
+# wait_for_db opens the connection with ensure_connection(), which is the call
+# that actually raises OperationalError while the db is unavailable
+ENSURE_CONNECTION = \
+    'django.db.backends.base.base.BaseDatabaseWrapper.ensure_connection'
+
 
 class CommandTests(TestCase):
 
@@ -17,27 +29,81 @@ class CommandTests(TestCase):
         '''
         Test waiting for db when db is avialable
         '''
-        # we must override the behavior of the excpetion handler
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.return_value = True
+        # we must override the behavior of the connection probe, so the
+        # command believes the connection was opened successfully
+        with patch(ENSURE_CONNECTION) as ec:
+            ec.return_value = None
             call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 1)
+            self.assertEqual(ec.call_count, 1)
 
-    # this mock replaces the behavior of time.sleep with a mock function that
+    # this mock replaces the command's sleep hook with a mock function that
     # returns True, so during our tests it wont acutally wait all the seconds
-    @patch('time.sleep', return_value=True)
+    @patch.object(Command, '_sleep', return_value=True)
     def test_wait_for_db(self, ts):
         '''
         Test waiting for db
         '''
         # when we create our management command it will be WHILE LOOP that
-        # checks to see if the connection handler raises the OperationalError.
-        # And if it does than it will wait a SECOND and try again. So it does
-        # not flood the output by trying every microsecond to test for the db.
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
+        # checks to see if opening the connection raises the OperationalError.
+        # And if it does than it will wait and try again, doubling the wait
+        # every time. So it does not flood the output by trying every
+        # microsecond to test for the db.
+        with patch(ENSURE_CONNECTION) as ec:
             # we are going to add a side effect that raises OperationalError
             # the first five times it tries. And on the sixth try it will
             # complete the call.
-            gi.side_effect = [OperationalError] * 5 + [True]
+            ec.side_effect = [OperationalError] * 5 + [None]
             call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 6)
+            self.assertEqual(ec.call_count, 6)
+            # the wait between probes doubles after each failure
+            self.assertEqual(
+                ts.call_args_list,
+                [call(0.1), call(0.2), call(0.4), call(0.8), call(1.6)]
+            )
+
+    @patch.object(Command, '_sleep', return_value=True)
+    def test_wait_for_db_gives_up(self, ts):
+        '''
+        Test waiting for db raises an error once max attempts are used up
+        '''
+        with patch(ENSURE_CONNECTION) as ec:
+            ec.side_effect = OperationalError
+            with self.assertRaises(CommandError):
+                call_command('wait_for_db', max_attempts=3)
+            self.assertEqual(ec.call_count, 3)
+
+    @patch.object(Command, '_sleep', return_value=True)
+    def test_wait_for_db_port_closed(self, ts):
+        '''
+        Test the db login is only attempted once the db port is open
+        '''
+        # the cheap tcp check fails twice before the port starts listening
+        with patch('socket.create_connection') as cc, \
+                patch(ENSURE_CONNECTION) as ec:
+            cc.side_effect = [OSError, OSError, MagicMock()]
+            call_command('wait_for_db')
+            self.assertEqual(cc.call_count, 3)
+            self.assertEqual(ec.call_count, 1)
+
+    @patch.object(Command, '_sleep', return_value=True)
+    def test_wait_for_db_failure_stops_the_rest(self, ts):
+        '''
+        Test a database giving up tells the other databases to stop waiting
+        '''
+        command = Command()
+        with patch(ENSURE_CONNECTION) as ec:
+            ec.side_effect = OperationalError
+            with self.assertRaises(CommandError):
+                asyncio.run(command._wait_for_all(['default'], 90, 1))
+        self.assertTrue(command._stop.is_set())
+
+    def test_wait_for_db_stopped(self):
+        '''
+        Test waiting for a database ends without probing once stopped
+        '''
+        command = Command()
+        command._stop = threading.Event()
+        command._stop.set()
+        with patch(ENSURE_CONNECTION) as ec:
+            command._wait_for('default', 90, None)
+            self.assertEqual(ec.call_count, 0)
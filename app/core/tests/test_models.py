@@ -1,6 +1,7 @@
+from decimal import Decimal
 from unittest.mock import patch
 from django.test import TestCase
-from django.contrib.auth import get_user_model
+from django.contrib.auth import authenticate, get_user_model
 
 from core import models
 
@@ -36,10 +37,30 @@ class ModelTests(TestCase):
         '''
         Test the email for a new user is normalized
         '''
-        email = 'test@AMERICA.COM'
+        email = 'Test@AMERICA.COM'
         user = get_user_model().objects.create_user(email, 'password')
+        # the whole address is lowercased, including the local part
+        self.assertEqual(user.email, 'test@america.com')
+        # and logging in with any casing still finds the user
+        self.assertEqual(
+            get_user_model().objects.get_by_natural_key(email),
+            user
+        )
 
-        self.assertEqual(user.email, email.lower())
+    def test_saved_user_email_normalized(self):
+        '''
+        Test a user saved without create_user, like the admin does, can log in
+        '''
+        user = get_user_model()(email='Foo@Example.com', name='foo')
+        user.set_password('testpassword')
+        user.full_clean()
+        user.save()
+
+        self.assertEqual(user.email, 'foo@example.com')
+        self.assertEqual(
+            authenticate(username='Foo@Example.com', password='testpassword'),
+            user
+        )
 
     def test_new_user_invalid_email(self):
         '''
@@ -99,6 +120,44 @@ class ModelTests(TestCase):
         )
         self.assertEqual(str(recipe), recipe.title)
 
+    def test_recipe_price_cents(self):
+        '''
+        Test the recipe price is stored as a whole number of cents
+        '''
+        recipe = models.Recipe.objects.create(
+            user=sample_user(),
+            title='Beef Wellington',
+            time_minutes=5,
+            price=19.99
+        )
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.price_cents, 1999)
+        self.assertEqual(recipe.price, Decimal('19.99'))
+
+    def test_recipe_price_rounding(self):
+        '''
+        Test the recipe price takes decimals and strings, rounded to cents
+        '''
+        recipe = models.Recipe(title='Beef Wellington', time_minutes=5)
+        recipe.price = Decimal('2.675')
+        self.assertEqual(recipe.price_cents, 268)
+        recipe.price = '4.10'
+        self.assertEqual(recipe.price_cents, 410)
+        # a float is read as it prints, not as the binary value it stores
+        recipe.price = 1.005
+        self.assertEqual(recipe.price_cents, 101)
+
+    def test_for_user(self):
+        '''
+        Test for_user only returns the objects owned by the user
+        '''
+        user = sample_user()
+        other_user = sample_user(email='other@america.com')
+        tag = models.Tag.objects.create(user=user, name='Vegan')
+        models.Tag.objects.create(user=other_user, name='Fruity')
+
+        self.assertEqual(list(models.Tag.objects.for_user(user)), [tag])
+
     @patch('uuid.uuid4')
     def test_recipe_filename_uuid(self, mock_uuid):
         '''
@@ -113,9 +172,13 @@ class ModelTests(TestCase):
         # this means that anytime we call this uuid4 function, that is trigrd
         # from within our test, it will fhange the value, OVERRIDE the default
         # behavior and reutrn the new uuid variable's value instead.
-        mock_uuid.return_value = uuid
+        # the file path uses the .hex of the uuid, so mock that attribute
+        mock_uuid.return_value.hex = uuid
         #
         file_path = models.recipe_image_filepath(None, 'my_image.jpg')
         # now define the expected path and check it with an assertEqual
         expected_path = f'uploads/recipe/{uuid}.jpg'
         self.assertEqual(file_path, expected_path)
+        # a file without an extension still gets one
+        file_path = models.recipe_image_filepath(None, 'my_image')
+        self.assertEqual(file_path, f'uploads/recipe/{uuid}.bin')
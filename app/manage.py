@@ -3,7 +3,13 @@ import os
 import sys
 
 if __name__ == '__main__':
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    # run the tests with the test settings (fast password hasher) even
+    # when nobody remembers to pass --settings
+    if sys.argv[1:2] == ['test']:
+        settings_module = 'app.settings_test'
+    else:
+        settings_module = 'app.settings'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
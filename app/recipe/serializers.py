@@ -40,6 +40,13 @@ class RecipeSerializer(serializers.ModelSerializer):
         many=True,
         queryset=Tag.objects.all()
     )
+    # price is a property on the model backed by price_cents, so declare the
+    # field here to keep the api accepting and returning dollars
+    price = serializers.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        min_value=0
+    )
 
     class Meta:
         model = Recipe
@@ -50,6 +57,26 @@ class RecipeSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
         # now define primary key related fields (above)
 
+    def get_fields(self):
+        '''
+        Only accept tags and ingredients owned by the requesting user
+        '''
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None:
+            return fields
+        for name, model in (('ingredients', Ingredient), ('tags', Tag)):
+            field = fields[name]
+            # with many=True the queryset used to look up each id lives on
+            # the child field. the detail serializer nests read only
+            # serializers here instead, which have nothing to look up
+            if isinstance(field, serializers.ManyRelatedField):
+                # only the id is needed to validate and assign the objects
+                field.child_relation.queryset = model.objects.for_user(
+                    request.user
+                ).only('id')
+        return fields
+
 
 # nest recipe serializer inside of our detail serializer
 class RecipeDetailSerializer(RecipeSerializer):
@@ -0,0 +1,37 @@
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
+from django.utils.encoding import filepath_to_uri
+
+
+class InMemoryStorage(Storage):
+    '''
+    File storage that keeps files in a dictionary instead of on disk
+    '''
+    # only meant for the tests, so uploads never have to be written to (and
+    # cleaned up from) MEDIA_ROOT. every time a test changes the storage
+    # setting django builds a new instance, so files don't outlive the tests
+
+    def __init__(self):
+        self._files = {}
+
+    def _open(self, name, mode='rb'):
+        return ContentFile(self._files[name], name=name)
+
+    def _save(self, name, content):
+        self._files[name] = b''.join(content.chunks())
+        return name
+
+    def delete(self, name):
+        self._files.pop(name, None)
+
+    def exists(self, name):
+        return name in self._files
+
+    def size(self, name):
+        return len(self._files[name])
+
+    def url(self, name):
+        return urljoin(settings.MEDIA_URL, filepath_to_uri(name))
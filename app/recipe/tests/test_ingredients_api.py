@@ -1,20 +1,20 @@
 from django.contrib.auth import get_user_model
-from django.urls import reverse
-from django.test import TestCase
+from django.urls import reverse_lazy
+from django.test import SimpleTestCase, TestCase
 from rest_framework import status
 from rest_framework.test import APIClient
 from core.models import Ingredient, Recipe
 from recipe.serializers import IngredientSerializer
 
 
-INGREDIENTS_URL = reverse('recipe:ingredient-list')
+INGREDIENTS_URL = reverse_lazy('recipe:ingredient-list')
 
 
 def create_user(**params):
     return get_user_model().objects.create_user(**params)
 
 
-class PublicIngredientsApiTests(TestCase):
+class PublicIngredientsApiTests(SimpleTestCase):
     '''
     Test the publicly available ingredients API
     '''
@@ -35,22 +35,39 @@ class PrivateIngredientsApiTests(TestCase):
     Test the private ingredients API
     '''
 
-    def setUp(self):
-        self.client = APIClient()
-        self.user = create_user(
+    @classmethod
+    def setUpTestData(cls):
+        # created once for the class, see PrivateRecipeApiTests in
+        # test_recipe_api.py for what is and isn't reset between tests
+        cls.user = create_user(
             email='test@america.com',
             password='testpassword',
             name='Test Name'
         )
-        self.client.force_authenticate(self.user)
+        # a second user, only there to own ingredients we shouldn't see
+        cls.user2 = create_user(
+            email='test@user2.com',
+            password='password',
+            name='Test Name'
+        )
+        # one authenticated client for the whole class, none of the tests
+        # change its credentials, so there's no need to build a new one
+        # for every test
+        cls.api_client = APIClient()
+        cls.api_client.force_authenticate(cls.user)
+
+    def setUp(self):
+        self.client = self.api_client
 
     def test_retrieve_ingredients_list(self):
         '''
         Test retrieving a list of ingedients
         '''
-        # sample ingredients
-        Ingredient.objects.create(user=self.user, name='salt')
-        Ingredient.objects.create(user=self.user, name='garlic')
+        # sample ingredients, inserted together in one query
+        Ingredient.objects.bulk_create([
+            Ingredient(user=self.user, name='salt'),
+            Ingredient(user=self.user, name='garlic'),
+        ])
 
         response = self.client.get(INGREDIENTS_URL)
         # verify that returned result matches serialized ingredients
@@ -64,14 +81,11 @@ class PrivateIngredientsApiTests(TestCase):
         '''
         Test that ingredients are returned for auth'd user
         '''
-        payload = {
-            'email': 'test@user2.com',
-            'password': 'password',
-            'name': 'Test Name'
-        }
-        user2 = create_user(**payload)
-        Ingredient.objects.create(user=user2, name='pepper')
-        ingredient = Ingredient.objects.create(user=self.user, name='rosemary')
+        ingredient = Ingredient(user=self.user, name='rosemary')
+        Ingredient.objects.bulk_create([
+            Ingredient(user=self.user2, name='pepper'),
+            ingredient,
+        ])
 
         response = self.client.get(INGREDIENTS_URL)
 
@@ -84,13 +98,12 @@ class PrivateIngredientsApiTests(TestCase):
         Test create a new Ingredient
         '''
         payload = {'name': 'Romain Lettuce'}
-        self.client.post(INGREDIENTS_URL, payload)
+        response = self.client.post(INGREDIENTS_URL, payload)
 
-        exists = Ingredient.objects.filter(
-            user=self.user,
-            name=payload['name']
-        ).exists()
-        self.assertTrue(exists)
+        # the response already holds the saved ingredient, no need to go
+        # back to the database to look for it
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['name'], payload['name'])
 
     def test_create_ingredient_invalid(self):
         '''
@@ -107,14 +120,12 @@ class PrivateIngredientsApiTests(TestCase):
         Test filtering ingredients by those assigned to recipes
         '''
         # create two ingredients, leave ingredient2 unassigned
-        ingredient1 = Ingredient.objects.create(
-            user=self.user,
-            name='Peach'
-        )
-        ingredient2 = Ingredient.objects.create(
-            user=self.user,
-            name='Butter'
-        )
+        # (postgres hands the new ids back from bulk_create, so we can
+        # still assign them below)
+        ingredient1, ingredient2 = Ingredient.objects.bulk_create([
+            Ingredient(user=self.user, name='Peach'),
+            Ingredient(user=self.user, name='Butter'),
+        ])
         # create a recipe
         recipe1 = Recipe.objects.create(
             title='Peach Cobbler',
@@ -137,16 +148,11 @@ class PrivateIngredientsApiTests(TestCase):
         '''
         Test filtering ingredients by assigned returns unique items
         '''
-        # create an ingredient that will be assigned
-        ingredient1 = Ingredient.objects.create(
-            user=self.user,
-            name='Tea'
-        )
-        # create ingredient object that will not get assigned
-        Ingredient.objects.create(
-            user=self.user,
-            name='Elevensies'
-        )
+        # create an ingredient that will be assigned, and one that won't
+        ingredient1, _ = Ingredient.objects.bulk_create([
+            Ingredient(user=self.user, name='Tea'),
+            Ingredient(user=self.user, name='Elevensies'),
+        ])
         # create a recipe
         recipe1 = Recipe.objects.create(
             title='Afternoon Tea',
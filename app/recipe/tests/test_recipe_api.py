@@ -1,22 +1,38 @@
-# python function that allows you to generate temp files
-import tempfile
-import os
+# in memory file, used to build the test images without touching the disk
+import io
+import json
+from functools import lru_cache
+from types import MappingProxyType
+from unittest.mock import patch
 # pillow requirements importing our image class which will then let us create
 # test images which we can then upload to our API
 from PIL import Image
 from django.contrib.auth import get_user_model
-from django.test import TestCase
-from django.urls import reverse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse, reverse_lazy
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.test import (
+    APIClient, APIRequestFactory, force_authenticate
+)
 from core.models import Recipe, Tag, Ingredient
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
+from recipe.views import RecipeViewSet
 
 
 # /api/recipe/recipes
-RECIPES_URL = reverse('recipe:recipe-list')
-
-
+# lazy, so the url is only resolved when a test first uses it, and not
+# whenever this module is imported
+RECIPES_URL = reverse_lazy('recipe:recipe-list')
+# /api/recipe/recipes/export
+RECIPES_EXPORT_URL = reverse_lazy('recipe:recipe-export')
+# the list view on its own, for tests that call it without going through
+# the url routing and middleware of the test client
+RECIPE_LIST_VIEW = RecipeViewSet.as_view({'get': 'list'})
+
+
+# reverse() walks the url resolver every time, and the url for an id never
+# changes, so remember the ones we've already built
+@lru_cache(maxsize=None)
 def image_upload_url(recipe_id):
     '''
     Return URL for recipe image upload
@@ -26,6 +42,7 @@ def image_upload_url(recipe_id):
 
 
 # /api/recipe/recipes/2 (example)
+@lru_cache(maxsize=None)
 def detail_recipe_url(recipe_id):
     '''
     Return recipe detail URL
@@ -53,25 +70,45 @@ def create_user(**params):
     return get_user_model().objects.create_user(**params)
 
 
+# set of default values with required recipe fields, read only so no test
+# can change them by accident for the tests that run after it
+RECIPE_DEFAULTS = MappingProxyType({
+    'title': 'Sample Recipe',
+    'time_minutes': 10,
+    'price': 10.00,
+})
+
+
+def sample_recipe_defaults(**params):
+    '''
+    Return the fields of a sample recipe
+    '''
+    # any parameters that are passed in, will override any of
+    # of the default values
+    return {**RECIPE_DEFAULTS, **params}
+
+
 def sample_recipe(user, **params):
     '''
     Create and return a sample recipe
     '''
-    # set of default values with required recipe fields
-    # any parameters that are passed in after 'user', will override any of
-    # of the default values we set here.
-    defaults = {
-        'title': 'Sample Recipe',
-        'time_minutes': 10,
-        'price': 10.00,
-    }
-    # update function from python library will allow us to customize
-    defaults.update(params)
     # **defaults will convert our dictionary into an argument
-    return Recipe.objects.create(user=user, **defaults)
+    return Recipe.objects.create(user=user, **sample_recipe_defaults(**params))
 
 
-class PublicRecipeApiTests(TestCase):
+def sample_recipes(user, titles, **params):
+    '''
+    Create and return a sample recipe for each title, in a single insert
+    '''
+    # postgres hands the new ids back from bulk_create, so the recipes can
+    # be used just like the ones sample_recipe returns
+    return Recipe.objects.bulk_create([
+        Recipe(user=user, **sample_recipe_defaults(title=title, **params))
+        for title in titles
+    ])
+
+
+class PublicRecipeApiTests(SimpleTestCase):
     '''
     Test unauthenticated user no recipe API access
     '''
@@ -93,58 +130,139 @@ class PrivateRecipeApiTests(TestCase):
     Test authenticated Recipe API Access
     '''
 
-    def setUp(self):
-        self.client = APIClient()
-        self.user = create_user(
+    @classmethod
+    def setUpTestData(cls):
+        # created once for the class. each test runs in a transaction that
+        # is rolled back, so the rows are back to this for the next test,
+        # but cls.user and the other objects set here are the same python
+        # objects in every test, django doesn't copy them. a test that
+        # changes one has to reload it from the database, not edit it
+        cls.user = create_user(
             email='test@america.com',
             password='testpassword',
             name='Test Name'
         )
-        self.client.force_authenticate(self.user)
+        # a second user, only there to own objects we shouldn't see or use
+        cls.user2 = create_user(
+            email='test@user2.com',
+            password='testpassword',
+            name='Test Name'
+        )
+        # one authenticated client for the whole class, none of the tests
+        # change its credentials, so there's no need to build a new one
+        # for every test
+        cls.api_client = APIClient()
+        cls.api_client.force_authenticate(cls.user)
+        # recipes for the list tests to read, two for the user and one for
+        # user2, seeded once for the class because no test changes them
+        cls.recipes = sample_recipes(
+            cls.user,
+            ['Sample Recipe', 'Sample Recipe']
+        )
+        cls.other_recipe = sample_recipe(user=cls.user2)
+
+    def setUp(self):
+        self.client = self.api_client
+
+    def list_recipes(self):
+        '''
+        Call the recipe list view directly as the authenticated user
+        '''
+        # the list tests only care about what the view returns, so skip
+        # the client's trip through url resolution and the middleware
+        request = APIRequestFactory().get(RECIPES_URL)
+        force_authenticate(request, user=self.user)
+        return RECIPE_LIST_VIEW(request)
 
     def test_retrieve_recipes(self):
         '''
         test retrieving a list of recipes
         '''
-        # create two recipe objects using our sample_recipe helper function.
-        # do not need to assign them to a variable becuase we dont need to
-        # access them in this test
-        sample_recipe(user=self.user)
-        sample_recipe(user=self.user)
+        # the recipes were created in setUpTestData
         # simulate get request
-        response = self.client.get(RECIPES_URL)
-        # now retrieve recipes from db
-        recipes = Recipe.objects.all().order_by('-id')
-        # pass our recipe into a serializer, return as a list(many=true)
-        serializer = RecipeSerializer(recipes, many=True)
+        # pin the number of queries: the recipes, then their ingredients and
+        # their tags in one prefetch query each, however many recipes there
+        # are. a change that looks them up per recipe will fail here
+        with self.assertNumQueries(3):
+            response = self.list_recipes()
+        # now retrieve the ids of the user's recipes from db, in the model's
+        # default newest first order
+        recipe_ids = Recipe.objects.filter(user=self.user).values_list(
+            'id', flat=True
+        )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        # assert that the data equals the serializer that we created
-        self.assertEqual(response.data, serializer.data)
+        # assert that we got back the same recipes, in the same order.
+        # comparing the ids is enough here, the serialized fields
+        # themselves are checked by the filter tests below
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data],
+            list(recipe_ids)
+        )
+
+    def test_export_recipes(self):
+        '''
+        Test the export streams the same recipes as the list
+        '''
+        # a chunk size of one, so the export has to join up several chunks
+        with patch.object(RecipeViewSet, 'export_chunk_size', 1):
+            response = self.client.get(RECIPES_EXPORT_URL)
+            content = b''.join(response.streaming_content)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(
+            json.loads(content.decode()),
+            json.loads(json.dumps(self.list_recipes().data))
+        )
 
     def test_recipes_limited_to_user(self):
         '''
         Test retrieving recipes to authenticated user
         '''
-        user2 = create_user(
-            email='test@user2.com',
-            password='testpassword',
-            name='Test Name'
-        )
-        # create a recipe object for each user, first unauthenticate user
-        sample_recipe(user=user2)
-        # second make recipe object for authenticated user
-        sample_recipe(user=self.user)
+        # setUpTestData made two recipes for the authenticated user, and one
+        # for user2, which should be left out
         # simulate get http
-        response = self.client.get(RECIPES_URL)
-        # now filter recipes by authenticated user
-        recipes = Recipe.objects.filter(user=self.user)
-        # pass in returned queryset to serializer
-        serializer = RecipeSerializer(recipes, many=True)
+        # recipes, ingredients and tags, see test_retrieve_recipes
+        with self.assertNumQueries(3):
+            response = self.list_recipes()
         # make assertions
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(len(response.data), len(self.recipes))
+        self.assertNotIn(
+            self.other_recipe.id,
+            [recipe['id'] for recipe in response.data]
+        )
+
+    def test_retrieve_recipes_query_count(self):
+        '''
+        Test that the recipe list query count doesn't grow with the recipes
+        '''
+        # ten more recipes, each with a tag and an ingredient, so the tags
+        # and ingredients would have to be looked up for every recipe
+        # without the prefetch
+        recipes = sample_recipes(self.user, [f'Recipe {i}' for i in range(10)])
+        tags = Tag.objects.bulk_create([
+            Tag(user=self.user, name=f'Tag {i}') for i in range(10)
+        ])
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(user=self.user, name=f'Ingredient {i}')
+            for i in range(10)
+        ])
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(recipe=recipe, tag=tag)
+            for recipe, tag in zip(recipes, tags)
+        ])
+        Recipe.ingredients.through.objects.bulk_create([
+            Recipe.ingredients.through(recipe=recipe, ingredient=ingredient)
+            for recipe, ingredient in zip(recipes, ingredients)
+        ])
+        # still just the recipes, ingredients and tags
+        with self.assertNumQueries(3):
+            response = self.list_recipes()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), len(self.recipes) + 10)
 
     def test_view_recipe_detail(self):
         '''
@@ -158,9 +276,16 @@ class PrivateRecipeApiTests(TestCase):
         recipe.ingredients.add(sample_ingredient(user=self.user))
         # generate a url that we will call
         url = detail_recipe_url(recipe.id)
-        # generate http get for the url
-        response = self.client.get(url)
+        # generate http get for the url, which takes the recipe and its
+        # ingredients and tags, prefetched by the recipe manager, nothing
+        # else (the serializer never reads the user)
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
         # now we expect the response to be serialized
+        # fetch the recipe again through the manager, which prefetches its
+        # tags and ingredients, so serializing it doesn't query them one
+        # relation at a time
+        recipe = Recipe.objects.get(id=recipe.id)
         serializer = RecipeDetailSerializer(recipe)
         self.assertEqual(response.data, serializer.data)
 
@@ -174,14 +299,24 @@ class PrivateRecipeApiTests(TestCase):
             'time_minutes': 25,
             'price': 7.00
         }
-        # post the payload dictionary to RECIPES_URL
-        response = self.client.post(RECIPES_URL, payload)
+        # post the payload dictionary to RECIPES_URL, as json, which is
+        # cheaper to encode (and parse) than the default multipart form.
+        # unlike a form, json has to list the (empty) tags and ingredients,
+        # a form leaving them out is read as empty lists
+        response = self.client.post(
+            RECIPES_URL,
+            {**payload, 'tags': [], 'ingredients': []},
+            format='json'
+        )
         # standard hjttp repsonse code for creating objects in an api
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         # when you create an object using gjango rest framework, the default
         # behavior is it will return a dictionary containg the created object!
-        # retrieve created recipe from our models
-        recipe = Recipe.objects.get(id=response.data['id'])
+        # retrieve created recipe from our models, only loading the columns
+        # we check (price is worked out from price_cents)
+        recipe = Recipe.objects.only(
+            'id', 'title', 'time_minutes', 'price_cents'
+        ).get(id=response.data['id'])
         # loop through each keys and check that the correct value is assigned
         # to recipe model
         for key in payload.keys():
@@ -193,58 +328,80 @@ class PrivateRecipeApiTests(TestCase):
         '''
         Test creating recipe with tags
         '''
-        # create 2 sample tags to test
-        tag1 = sample_tag(user=self.user, name='Mexican')
-        tag2 = sample_tag(user=self.user, name='Appetizer')
+        # create 2 sample tags to test, in one insert
+        tag1, tag2 = Tag.objects.bulk_create([
+            Tag(user=self.user, name='Mexican'),
+            Tag(user=self.user, name='Appetizer'),
+        ])
         # now create a recipe and assign the tags to the recipe
         payload = {
             'title': 'Avocado Dip',
             'tags': [tag1.id, tag2.id],
+            'ingredients': [],
             'time_minutes': 30,
             'price': 20.00,
         }
-        # make http post request
-        response = self.client.post(RECIPES_URL, payload)
+        # make http post request, as json like in test_create_basic_recipe
+        response = self.client.post(RECIPES_URL, payload, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        # retrieve recipe that was created
-        recipe = Recipe.objects.get(id=response.data['id'])
+        # retrieve recipe that was created, we only look at its relations,
+        # which the recipe manager prefetches, so skip its other columns
+        recipe = Recipe.objects.only('id').get(id=response.data['id'])
         # retieve tags that were created with the recipe
         # because we have a manytomany field assigned to our tags,
         # this will return all of the tags that were assigned to our recipe
-        # as a queryset and store them in a tags variable.
-        tags = recipe.tags.all()
-        # assert that our TWO tags were returned
-        self.assertEqual(tags.count(), 2)
-        # now assert that tags we created as our sample tags are the same
-        # that are in our query set.
-        self.assertIn(tag1, tags)
-        self.assertIn(tag2, tags)
+        # (already prefetched by the recipe manager, so no extra query)
+        tag_ids = {tag.id for tag in recipe.tags.all()}
+        # now assert that exactly the TWO tags we created as our sample tags
+        # were assigned, comparing the id sets in one go
+        self.assertEqual(tag_ids, {tag1.id, tag2.id})
+
+    def test_create_recipe_with_other_users_tag(self):
+        '''
+        Test creating recipe with a tag of another user fails
+        '''
+        tag = sample_tag(user=self.user2, name='Mexican')
+        payload = {
+            'title': 'Avocado Dip',
+            'tags': [tag.id],
+            'ingredients': [],
+            'time_minutes': 30,
+            'price': 20.00,
+        }
+        response = self.client.post(RECIPES_URL, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # make sure it's the tag that got rejected
+        self.assertEqual(list(response.data), ['tags'])
 
     def test_create_recipe_with_ingredients(self):
         '''
         Test creating recipe with ingredients
         '''
-        # create sample ingredients
-        ingredient1 = sample_ingredient(user=self.user, name='Avocado')
-        ingredient2 = sample_ingredient(user=self.user, name='tomato')
+        # create sample ingredients, in one insert
+        ingredient1, ingredient2 = Ingredient.objects.bulk_create([
+            Ingredient(user=self.user, name='Avocado'),
+            Ingredient(user=self.user, name='tomato'),
+        ])
         # now create a recipe and assign the ingredients to the recipe
         payload = {
             'title': 'Avocado Dip',
             'ingredients': [ingredient1.id, ingredient2.id],
+            'tags': [],
             'time_minutes': 30,
             'price': 20.00
         }
-        # make http post request
-        response = self.client.post(RECIPES_URL, payload)
+        # make http post request, as json like in test_create_basic_recipe
+        response = self.client.post(RECIPES_URL, payload, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        # retrieve recipe that was created
-        recipe = Recipe.objects.get(id=response.data['id'])
+        # retrieve recipe that was created, we only look at its relations,
+        # which the recipe manager prefetches, so skip its other columns
+        recipe = Recipe.objects.only('id').get(id=response.data['id'])
         # retrieve ingredients that were created with recipe
-        ingredients = recipe.ingredients.all()
-        # assert that our TWO ingredients were returned
-        self.assertEqual(ingredients.count(), 2)
-        self.assertIn(ingredient1, ingredients)
-        self.assertIn(ingredient2, ingredients)
+        ingredient_ids = {
+            ingredient.id for ingredient in recipe.ingredients.all()
+        }
+        # assert that exactly our TWO ingredients were returned
+        self.assertEqual(ingredient_ids, {ingredient1.id, ingredient2.id})
 
     def test_partial_updated_recipe(self):
         '''
@@ -270,12 +427,11 @@ class PrivateRecipeApiTests(TestCase):
         recipe.refresh_from_db()
         # assert that the title is equal to the new title, Fondant Tart
         self.assertEqual(recipe.title, payload['title'])
-        # retrieve all of the tags that are assigned to this recipe
-        tags = recipe.tags.all()
-        # assert that the length of the tags is 1, because we only patched 1
-        self.assertEqual(len(tags), 1)
-        # assert that the new tag is in the tags that we retrieved
-        self.assertIn(new_tag, tags)
+        # retrieve the ids of all of the tags that are assigned to this
+        # recipe, and assert that the new tag is the only one, because we
+        # only patched 1
+        tag_ids = list(recipe.tags.values_list('id', flat=True))
+        self.assertEqual(tag_ids, [new_tag.id])
 
     def test_full_update_recipe(self):
         '''
@@ -310,25 +466,36 @@ class PrivateRecipeApiTests(TestCase):
         self.assertEqual(len(tags), 0)
 
 
+# keep the uploaded images in memory, so the tests never write files to
+# MEDIA_ROOT (and we don't have to clean them up after every test)
+@override_settings(
+    DEFAULT_FILE_STORAGE='recipe.tests.storage.InMemoryStorage'
+)
 class RecipeImageUploadTests(TestCase):
 
-    def setUp(self):
-        # create client
-        self.client = APIClient()
-        # create user
-        self.user = get_user_model().objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        # create user, once for the whole class
+        cls.user = get_user_model().objects.create_user(
             'test@america.com',
             'testpassword'
         )
-        # authenticate user
-        self.client.force_authenticate(self.user)
-        # create recipe
-        self.recipe = sample_recipe(user=self.user)
+        # encode the test image once for the class, the bytes never change,
+        # so each test only needs a fresh buffer to read them from
+        image_file = io.BytesIO()
+        # creates an image with the Image class that we uploaded from
+        # the PIL Library,   black square that is 10 pixels by 10 pixels
+        Image.new('RGB', (10, 10)).save(image_file, format='JPEG')
+        cls.jpeg_bytes = image_file.getvalue()
+        # shared authenticated client, like in PrivateRecipeApiTests
+        cls.api_client = APIClient()
+        cls.api_client.force_authenticate(cls.user)
 
-    def tearDown(self):
-        # We want to make sure that our filesystem is kept clean after our
-        # tests, and this means REMOVING all of the test files that we create.
-        self.recipe.image.delete()
+    def setUp(self):
+        # use the class's authenticated client
+        self.client = self.api_client
+        # create recipe, per test because the tests change its image
+        self.recipe = sample_recipe(user=self.user)
 
     def test_upload_image_to_recipe(self):
         '''
@@ -336,34 +503,27 @@ class RecipeImageUploadTests(TestCase):
         '''
         # create the url using the sample recipe in the setUp
         url = image_upload_url(self.recipe.id)
-        # creates a names temporary file in the system at a random location,
-        # (usually in the /temp folder)
-        # this creates a temporary file in the system that we can then write
-        # too, and after you exit the context manager, (outside the
-        # with statement) it will automatically remove the file
-        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
-            # creates an image with the Image class that we uploaded from
-            # the PIL Library,   black square that is 10 pixels by 10 pixels
-            image = Image.new('RGB', (10, 10))
-            # save the image to our file, and then write the full map that
-            # you want to save it as.
-            image.save(ntf, format='JPEG')
-            # this is the way the pythton reads files, so we use seek function
-            # to set the pointer back to the beginning of the file, as if we
-            # jst opened it
-            ntf.seek(0)
-            # request with image payload and add the format option to our post
-            # to tell django that we want to make a multipart form request.
-            # A FORM THAT CONSISTS OF DATA. By default it would be a form that
-            # that just consists of a json object, but we want to post data
-            res = self.client.post(url, {'image': ntf}, format='multipart')
-            # now run assertions
+        # build the upload from the image encoded in setUpTestData, there
+        # is no need to write a file to disk just to read it straight back
+        image_file = io.BytesIO(self.jpeg_bytes)
+        # the upload takes its filename from the name attribute, like it
+        # would for a real file
+        image_file.name = 'test.jpg'
+        # request with image payload and add the format option to our post
+        # to tell django that we want to make a multipart form request.
+        # A FORM THAT CONSISTS OF DATA. By default it would be a form that
+        # that just consists of a json object, but we want to post data
+        res = self.client.post(url, {'image': image_file}, format='multipart')
+        # now run assertions
         self.recipe.refresh_from_db()
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         # now check that image from payload is in the response
         self.assertIn('image', res.data)
-        # check that path exists for image that is saved to model
-        self.assertTrue(os.path.exists(self.recipe.image.path))
+        # check that the image saved to the model is actually in storage,
+        # asking the storage instead of the filesystem so this keeps
+        # working whichever storage backend the tests use
+        image = self.recipe.image
+        self.assertTrue(image.storage.exists(image.name))
 
     def test_upload_image_bad_request(self):
         '''
@@ -384,14 +544,22 @@ class RecipeImageUploadTests(TestCase):
         # make the request with the filter parameters for the tags and ensure
         # that the results returned match the ones with the tags and exclude
         # the one without the tags
-        recipe1 = sample_recipe(user=self.user, title='Chicken Lime Soup')
-        recipe2 = sample_recipe(user=self.user, title='Salmon with lemon')
-        tag1 = sample_tag(user=self.user, name='soup')
-        tag2 = sample_tag(user=self.user, name='fish')
-        recipe1.tags.add(tag1)
-        recipe2.tags.add(tag2)
-
-        recipe3 = sample_recipe(user=self.user, title='Tenderloin')
+        recipe1, recipe2, recipe3 = sample_recipes(
+            self.user,
+            ['Chicken Lime Soup', 'Salmon with lemon', 'Tenderloin']
+        )
+        tag1, tag2 = Tag.objects.bulk_create([
+            Tag(user=self.user, name='soup'),
+            Tag(user=self.user, name='fish'),
+        ])
+        # assign the tags by inserting the rows of the many to many table
+        # directly, all in one query, .add() would query and insert for
+        # every recipe
+        RecipeTag = Recipe.tags.through
+        RecipeTag.objects.bulk_create([
+            RecipeTag(recipe=recipe1, tag=tag1),
+            RecipeTag(recipe=recipe2, tag=tag2),
+        ])
 
         # so now make request for soup and fish options in our database
         response = self.client.get(
@@ -417,17 +585,22 @@ class RecipeImageUploadTests(TestCase):
         '''
         Test returning recipes with specific ingredients
         '''
-        # create sample recipes
-        recipe1 = sample_recipe(user=self.user, title='French Dip')
-        recipe2 = sample_recipe(user=self.user, title='Mac n cheese Bake')
+        # create sample recipes, recipe3 won't get any ingredients
+        recipe1, recipe2, recipe3 = sample_recipes(
+            self.user,
+            ['French Dip', 'Mac n cheese Bake', 'Chicken Parmesean']
+        )
         # create sample ingredients
-        ingredient1 = sample_ingredient(user=self.user, name='Au Jus')
-        ingredient2 = sample_ingredient(user=self.user, name='Sharp Cheddar')
-        # add ingredients to recipe
-        recipe1.ingredients.add(ingredient1)
-        recipe2.ingredients.add(ingredient2)
-        # now make recipe without any ingredients added to it
-        recipe3 = sample_recipe(user=self.user, title='Chicken Parmesean')
+        ingredient1, ingredient2 = Ingredient.objects.bulk_create([
+            Ingredient(user=self.user, name='Au Jus'),
+            Ingredient(user=self.user, name='Sharp Cheddar'),
+        ])
+        # add ingredients to recipe, in one insert like the tags above
+        RecipeIngredient = Recipe.ingredients.through
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(recipe=recipe1, ingredient=ingredient1),
+            RecipeIngredient(recipe=recipe2, ingredient=ingredient2),
+        ])
 
         response = self.client.get(
             RECIPES_URL,
@@ -441,3 +614,26 @@ class RecipeImageUploadTests(TestCase):
         self.assertIn(serializer1.data, response.data)
         self.assertIn(serializer2.data, response.data)
         self.assertNotIn(serializer3.data, response.data)
+
+    def test_filter_recipes_invalid_ids(self):
+        '''
+        Test filtering recipes by ids that aren't numbers is a bad request
+        '''
+        response = self.client.get(RECIPES_URL, {'tags': '1,two'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_recipes_by_tags_unique(self):
+        '''
+        Test a recipe with more than one of the filtered tags is returned once
+        '''
+        recipe = sample_recipe(user=self.user, title='Chicken Lime Soup')
+        tag1 = sample_tag(user=self.user, name='soup')
+        tag2 = sample_tag(user=self.user, name='chicken')
+        recipe.tags.add(tag1, tag2)
+
+        response = self.client.get(
+            RECIPES_URL,
+            {'tags': f'{tag1.id},{tag2.id}'}
+        )
+
+        self.assertEqual(len(response.data), 1)
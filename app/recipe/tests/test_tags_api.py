@@ -1,22 +1,37 @@
 from django.contrib.auth import get_user_model
-from django.urls import reverse
-from django.test import TestCase
+from django.urls import reverse_lazy
+from django.test import SimpleTestCase, TestCase
 
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.test import (
+    APIClient, APIRequestFactory, force_authenticate
+)
 
 from core.models import Tag, Recipe
 from recipe.serializers import TagSerializer
+from recipe.views import TagViewSet
 
 
-TAGS_URLS = reverse('recipe:tag-list')
+TAGS_URLS = reverse_lazy('recipe:tag-list')
+# the list view on its own, for tests that call it without going through
+# the url routing and middleware of the test client
+TAG_LIST_VIEW = TagViewSet.as_view({'get': 'list'})
 
 
 def create_user(**params):
     return get_user_model().objects.create_user(**params)
 
 
-class PublicTagsApiTests(TestCase):
+def sample_tags(user, names):
+    '''
+    Create and return a tag for each name, in a single insert
+    '''
+    return Tag.objects.bulk_create([
+        Tag(user=user, name=name) for name in names
+    ])
+
+
+class PublicTagsApiTests(SimpleTestCase):
     '''
     Test the publicly available tags API
     '''
@@ -38,54 +53,85 @@ class PrivateTagsApiTests(TestCase):
     '''
     Test that tag API requires authentication
     '''
-    def setUp(self):
-        self.user = create_user(
+    @classmethod
+    def setUpTestData(cls):
+        # created once for the class, see PrivateRecipeApiTests in
+        # test_recipe_api.py for what is and isn't reset between tests
+        cls.user = create_user(
             email='test@america.com',
             password='testpassword',
             name='Test Name'
         )
-        # create re-usable client
-        self.client = APIClient()
+        # another user, only there to own tags we shouldn't see
+        cls.user2 = create_user(
+            email='test@user2.com',
+            password='testpassword',
+            name='Test Name'
+        )
+        # create re-usable client, shared by the whole class
+        cls.api_client = APIClient()
         # use the force authenticate method
-        self.client.force_authenticate(user=self.user)
+        cls.api_client.force_authenticate(user=cls.user)
+
+    def setUp(self):
+        self.client = self.api_client
+
+    def list_tags(self, params=None):
+        '''
+        Call the tag list view directly as the authenticated user
+        '''
+        # the list tests only care about what the view returns, so skip
+        # the client's trip through url resolution and the middleware
+        request = APIRequestFactory().get(TAGS_URLS, params)
+        force_authenticate(request, user=self.user)
+        return TAG_LIST_VIEW(request)
 
     def test_retrieve_tags(self):
         '''
         Test retrieving tags
         '''
         # create sample tags to retrieve
-        Tag.objects.create(user=self.user, name='Vegan')
-        Tag.objects.create(user=self.user, name='Lunch')
-        # simulate the attempt of the client to retrieve
-        response = self.client.get(TAGS_URLS)
-        # call a query to retrieve the tags
-        tags = Tag.objects.all().order_by('-name')
-        # create a serializer, must specifiy that many=True or the serializer
-        # will assume that you only want to serialize a single object
-        serializer = TagSerializer(tags, many=True)
+        sample_tags(self.user, ['Vegan', 'Lunch'])
+        # simulate the attempt of the client to retrieve, in a single
+        # query, see test_retrieve_tags_query_count
+        with self.assertNumQueries(1):
+            response = self.list_tags()
+        # call a query to retrieve the ids of the tags
+        tag_ids = Tag.objects.order_by('-name').values_list('id', flat=True)
         # check proper server code
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        # check that all data has been properly retrieved
-        self.assertEqual(response.data, serializer.data)
+        # check that all the tags were retrieved, in the right order. the
+        # serialized fields are checked by the assigned_only tests below
+        self.assertEqual(
+            [tag['id'] for tag in response.data],
+            list(tag_ids)
+        )
+
+    def test_retrieve_tags_query_count(self):
+        '''
+        Test that listing tags takes one query, however many tags there are
+        '''
+        sample_tags(self.user, [f'Tag {i}' for i in range(50)])
+        # the serializer only returns fields of the tag itself, so there
+        # is nothing to look up per tag. force_authenticate skips the token
+        # lookup, which leaves just the select of the tags
+        with self.assertNumQueries(1):
+            response = self.list_tags()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 50)
 
     def test_tags_limited_to_user(self):
         '''
         Test that tags returned are for the authenticated user
         '''
-        payload = {
-            'email': 'test@user2.com',
-            'password': 'testpassword',
-            'name': 'Test Name'
-        }
-        # create another user
-        user2 = create_user(**payload)
-        # create a tag for user 2 we just created
-        Tag.objects.create(user=user2, name='Fruity')
-        # create a tag for our authenticated user we created in setUp
-        tag = Tag.objects.create(user=self.user, name='Italian')
+        # create a tag for user 2, and one for our authenticated user, both
+        # created in setUpTestData, in one insert
+        tag = Tag(user=self.user, name='Italian')
+        Tag.objects.bulk_create([Tag(user=self.user2, name='Fruity'), tag])
         # create a response that simulates setUp user attempting to retrieve
         # there own tag object
-        response = self.client.get(TAGS_URLS)
+        response = self.list_tags()
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
@@ -139,7 +185,7 @@ class PrivateTagsApiTests(TestCase):
         # we are calling our filter assigned_only, and pass in a 1, which will
         # be evaluated by the prgraam as True, and it will filter by the tags
         # that are assigned only
-        response = self.client.get(TAGS_URLS, {'assigned_only': 1})
+        response = self.list_tags({'assigned_only': 1})
         # create a serailizer so we can verify if they are in the response
         serializer1 = TagSerializer(tag1)
         serializer2 = TagSerializer(tag2)
@@ -176,6 +222,6 @@ class PrivateTagsApiTests(TestCase):
         # assign recipe 2 to tag 1 as well
         recipe2.tags.add(tag1)
         # make call to retrieve tags ONLY assigned to a recipe
-        response = self.client.get(TAGS_URLS, {'assigned_only': 1})
+        response = self.list_tags({'assigned_only': 1})
         # make sure to return only ONE tag object (BREAKFAST)
         self.assertEqual(len(response.data), 1)
@@ -1,13 +1,23 @@
+import re
+
+from django.db.models import Exists, OuterRef
+from django.http import StreamingHttpResponse
 from rest_framework.decorators import action
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework.response import Response
 from rest_framework import viewsets, mixins, status
 from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 
 from core.models import Tag, Ingredient, Recipe
 from recipe import serializers
 
 
+# a comma separated list of ids, e.g. 1,2,3
+ID_LIST = re.compile(r'\A\d+(?:,\d+)*\Z')
+
+
 class TagIngredientAttrViewSet(viewsets.GenericViewSet,
                                mixins.ListModelMixin,
                                mixins.CreateModelMixin):
@@ -30,18 +40,25 @@ class TagIngredientAttrViewSet(viewsets.GenericViewSet,
             # into a false (0) bool
             int(self.request.query_params.get('assigned_only', 0))
         )
-        queryset = self.queryset
-        # if assigned_only is true, then apply a filter where only tags and
-        # ingredients that are assigned to recipes will be returned
-        if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
         # the request object should be passed into the 'self' as a class
         # variable, and the user should be assigned to that, because authent'n
         # is required.
-        return queryset.filter(
-            user=self.request.user
-            # add distinct() to make sure queryset returned is UNIQUE
-        ).order_by('-name').distinct()
+        queryset = self.queryset.model.objects.for_user(self.request.user)
+        # if assigned_only is true, then apply a filter where only tags and
+        # ingredients that are assigned to recipes will be returned
+        if assigned_only:
+            # ask if any recipe uses the object with an EXISTS subquery,
+            # rather than joining the recipes in, a join returns the object
+            # once per recipe, and would need a distinct() to undo that
+            assigned = Recipe.objects.filter(
+                **{self.recipe_field: OuterRef('pk')}
+            )
+            queryset = queryset.annotate(
+                assigned=Exists(assigned)
+            ).filter(assigned=True)
+        # only load the columns the serializer shows
+        fields = self.get_serializer_class().Meta.fields
+        return queryset.only(*fields).order_by('-name')
 
     def perform_create(self, serializer):
         '''
@@ -56,6 +73,8 @@ class TagViewSet(TagIngredientAttrViewSet):
     '''
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
+    # the field on Recipe that points at tags
+    recipe_field = 'tags'
 
 
 class IngredientViewSet(TagIngredientAttrViewSet):
@@ -64,6 +83,8 @@ class IngredientViewSet(TagIngredientAttrViewSet):
     '''
     queryset = Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
+    # the field on Recipe that points at ingredients
+    recipe_field = 'ingredients'
 
 
 class RecipeViewSet(viewsets.ModelViewSet):
@@ -71,7 +92,17 @@ class RecipeViewSet(viewsets.ModelViewSet):
     Manage Recipes in the databse
     '''
     serializer_class = serializers.RecipeSerializer
+    # the actions that use a different serializer than serializer_class
+    action_serializers = {
+        'retrieve': serializers.RecipeDetailSerializer,
+        'upload_image': serializers.RecipeImageSerializer,
+    }
     queryset = Recipe.objects.all()
+    # serializer fields that are model properties, and the column each one
+    # is worked out from
+    property_columns = {'price': 'price_cents'}
+    # how many recipes the export loads and serializes at a time
+    export_chunk_size = 500
     authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAuthenticated,)
 
@@ -80,8 +111,12 @@ class RecipeViewSet(viewsets.ModelViewSet):
         Convert a list of string ID's to a list of integers
         '''
         # qs is the comma separated list of ID's, in the form of a string which
-        # we will convert to a python list of integer types
-        return [int(str_id) for str_id in qs.split(',')]
+        # we will convert to a python list of integer types. check the whole
+        # string in one go first, so a bad id is a 400 instead of int()
+        # blowing up into a 500
+        if not ID_LIST.match(qs):
+            raise ValidationError('Expected a comma separated list of ids.')
+        return list(map(int, qs.split(',')))
 
     def get_queryset(self):
         '''
@@ -96,39 +131,61 @@ class RecipeViewSet(viewsets.ModelViewSet):
         # be reassigning our queryset with the filtered options, we want to
         # reference it by the new queryset variable, apply the filters, and
         # return it, instead of our MAIN queryset
-        queryset = self.queryset
+        queryset = Recipe.objects.for_user(self.request.user)
         # apply the _params_to_ints function that was created above to return
         # a list of individual id's
         if tags:
             tag_ids = self._params_to_ints(tags)
-            # now filter the queryset
-            # this is the django syntax for filtering on foreign key objects.
-            # We have a tags field in our Recipe queryset, and that has a
-            # foreign key to the tags table which has an id. So if you want to
-            # filter by that id on the remote table then we do TWO UNDERSCORES,
-            # and then we do another TWO UNDERSCORES and we apply a function
-            # called in which says return all of the tags where the id is
-            # in the list that we provide.
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            # now filter the queryset, keeping the recipes that have a row
+            # in the recipe/tag table for any of the ids. asking with an
+            # EXISTS subquery, instead of joining the tags in, answers it
+            # from the index on that table, and returns each recipe once
+            # however many of the tags it has, without needing a distinct()
+            has_tags = Recipe.tags.through.objects.filter(
+                recipe_id=OuterRef('pk'),
+                tag_id__in=tag_ids
+            )
+            queryset = queryset.annotate(
+                has_tags=Exists(has_tags)
+            ).filter(has_tags=True)
         # now do the same thing with the ingredients
         if ingredients:
             ingredients_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredients_ids)
-        return queryset.filter(user=self.request.user)
+            has_ingredients = Recipe.ingredients.through.objects.filter(
+                recipe_id=OuterRef('pk'),
+                ingredient_id__in=ingredients_ids
+            )
+            queryset = queryset.annotate(
+                has_ingredients=Exists(has_ingredients)
+            ).filter(has_ingredients=True)
+        if self.action in ('list', 'retrieve', 'export'):
+            # only load the columns the recipe serializers show. the query
+            # count tests catch a missing one, a deferred column would be
+            # loaded with a query per recipe
+            queryset = queryset.only(*self._read_columns())
+        return queryset
+
+    def _read_columns(self):
+        '''
+        Return the recipe columns the action's serializer reads
+        '''
+        columns = []
+        for name in self.get_serializer_class().Meta.fields:
+            name = self.property_columns.get(name, name)
+            # the tags and ingredients come from the prefetch instead
+            if not Recipe._meta.get_field(name).many_to_many:
+                columns.append(name)
+        return columns
 
     def get_serializer_class(self):
         '''
         return appropriate serializer class
         '''
-        # check the self.action class variable which will contain the action
-        # that is being used for our current request
-        if self.action == 'retrieve':
-            return serializers.RecipeDetailSerializer
-        elif self.action == 'upload_image':
-            return serializers.RecipeImageSerializer
-        # if the retrieve or upload is not called, we will just return the
-        # recipe, rather than the recipe DETAIL
-        return self.serializer_class
+        # look up the self.action class variable, which will contain the
+        # action that is being used for our current request. any action that
+        # isn't in action_serializers just gets the recipe, rather than the
+        # recipe DETAIL
+        return self.action_serializers.get(self.action, self.serializer_class)
 
     def perform_create(self, serializer):
         '''
@@ -153,21 +210,55 @@ class RecipeViewSet(viewsets.ModelViewSet):
             recipe,
             data=request.data
         )
-        # validate the data to make sure everything is correct
-        if serializer.is_valid():
-            # because we are using a model serialier, in our Recipe serializer
-            # you can use the save funciton to save the object. This
-            # performs a save on the recipe model with the updataed data
-            serializer.save()
-            return Response(
-                serializer.data,
-                status=status.HTTP_200_OK
-            )
-        # add default behavior which is assuming that we don't return response,
+        # validate the data to make sure everything is correct. if there
+        # are errors, django rest_framework raises them, and its exception
+        # handler sends them back with a 400 response
+        serializer.is_valid(raise_exception=True)
+        # because we are using a model serialier, in our Recipe serializer
+        # you can use the save funciton to save the object. This
+        # performs a save on the recipe model with the updataed data
+        serializer.save()
         return Response(
-            # django performs auto validation for us and if there are errors
-            # django will generate a list/description of all of the errors
-            serializer.errors,
-            # now assign the request to the response
-            status=status.HTTP_400_BAD_REQUEST
+            serializer.data,
+            status=status.HTTP_200_OK
         )
+
+    @action(methods=['GET'], detail=False, url_path='export')
+    def export(self, request):
+        '''
+        Stream all of the user's recipes as one JSON list
+        '''
+        # the list endpoint loads every recipe, and renders all of them, in
+        # memory before sending anything. the export sends them a chunk at
+        # a time instead, so memory use doesn't grow with the recipe count.
+        # it takes the same tags and ingredients filters as the list
+        return StreamingHttpResponse(
+            self._export_chunks(self.get_queryset().order_by('-id')),
+            content_type='application/json'
+        )
+
+    def _export_chunks(self, queryset):
+        '''
+        Yield the recipes of queryset as JSON, one chunk at a time
+        '''
+        # the same output as the JSONRenderer, compact and not ascii only
+        encoder = JSONEncoder(separators=(',', ':'), ensure_ascii=False)
+        yield '['
+        separator = ''
+        last_id = None
+        while True:
+            # iterator() would skip the tags and ingredients prefetch, and
+            # look them up per recipe, so load the chunks as normal
+            # querysets. carry on after the last id instead of using an
+            # offset, so the database doesn't count past every earlier row
+            chunk = queryset
+            if last_id is not None:
+                chunk = chunk.filter(id__lt=last_id)
+            chunk = list(chunk[:self.export_chunk_size])
+            if not chunk:
+                break
+            for recipe in self.get_serializer(chunk, many=True).data:
+                yield separator + encoder.encode(recipe)
+                separator = ','
+            last_id = chunk[-1].id
+        yield ']'
@@ -3,6 +3,43 @@ from rest_framework import serializers
 from django.utils.translation import ugettext_lazy as _
 
 
+class UserListSerializer(serializers.ListSerializer):
+    '''
+    Serializer for creating many users at once
+    '''
+
+    def validate(self, attrs):
+        '''
+        Make sure every email in the list is only used once
+        '''
+        # each email was already checked against the database on its own,
+        # but not against the rest of the list
+        emails = [user['email'] for user in attrs]
+        if len(set(emails)) != len(emails):
+            raise serializers.ValidationError(
+                _('The same email was given more than once.'),
+                code='unique'
+            )
+        return attrs
+
+    def create(self, validated_data):
+        '''
+        create all of the users with encrypted passwords in one insert
+        '''
+        # the same as create_user, but collect the users and save them all
+        # together, instead of one insert per user. the emails were
+        # already normalized by validate_email
+        model = get_user_model()
+        users = []
+        for data in validated_data:
+            data = dict(data)
+            password = data.pop('password')
+            user = model(**data)
+            user.set_password(password)
+            users.append(user)
+        return model.objects.bulk_create(users)
+
+
 class UserSerializer(serializers.ModelSerializer):
     '''
     serializer for the users object
@@ -11,8 +48,29 @@ class UserSerializer(serializers.ModelSerializer):
         model = get_user_model()
         fields = ('email', 'password', 'name')
         extra_kwargs = {
-            'password': {'write_only': True, 'min_length': 8}
+            'password': {'write_only': True, 'min_length': 8},
+            # drop the generated unique check on the email as it was typed,
+            # validate_email does its own on the normalized email
+            'email': {'validators': []},
         }
+        list_serializer_class = UserListSerializer
+
+    def validate_email(self, value):
+        '''
+        Normalize the email the same way the user manager stores it
+        '''
+        email = get_user_model().objects.normalize_email(value)
+        # emails are stored lowercased, so compare against the normalized
+        # email to catch an existing user typed with different casing
+        users = get_user_model().objects.filter(email=email)
+        if self.instance is not None:
+            users = users.exclude(pk=self.instance.pk)
+        if users.exists():
+            raise serializers.ValidationError(
+                _('A user with that email already exists.'),
+                code='unique'
+            )
+        return email
 
     def create(self, validated_data):
         '''
@@ -44,11 +102,25 @@ class UserSerializer(serializers.ModelSerializer):
         # if the user provided password
         if password:
             user.set_password(password)
-            user.save()
+            # the rest of the row was just saved by super().update, so only
+            # write the new password hash
+            user.save(update_fields=['password'])
 
         return user
 
 
+class UserReadSerializer(serializers.ModelSerializer):
+    '''
+    Serializer for showing a user
+    '''
+    # only ever used to render the user, so no field needs to be writable,
+    # and none of the validation (e.g. the unique email check) is set up
+    class Meta:
+        model = get_user_model()
+        fields = ('email', 'name')
+        read_only_fields = fields
+
+
 class AuthTokenSerializer(serializers.Serializer):
     '''
     Serializer for the user authentication object
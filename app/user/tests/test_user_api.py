@@ -1,6 +1,6 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 from django.contrib.auth import get_user_model
-from django.urls import reverse
+from django.urls import reverse_lazy
 
 # rest_framework test helper tools
 # test client that we can use to make requests to our api and check responses
@@ -8,10 +8,12 @@ from rest_framework.test import APIClient
 # module that contains helper status codes i.e., http 200 OK
 from rest_framework import status
 
+from user.serializers import UserSerializer
 
-CREATE_USER_URL = reverse('user:create')
-TOKEN_URL = reverse('user:token')
-ME_URL = reverse('user:me')
+
+CREATE_USER_URL = reverse_lazy('user:create')
+TOKEN_URL = reverse_lazy('user:token')
+ME_URL = reverse_lazy('user:me')
 
 
 def create_user(**params):
@@ -49,6 +51,22 @@ class PublicUserApiTests(TestCase):
         # the user object, as this is a security threat.
         self.assertNotIn('password', response.data)
 
+    def test_create_user_queries(self):
+        '''
+        Test creating a user checks the email once before the insert
+        '''
+        payload = {
+            'email': 'New@America.com',
+            'password': 'testpassword',
+            'name': 'Test name'
+        }
+        # one lookup of the normalized email, then the insert
+        with self.assertNumQueries(2):
+            response = self.client.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['email'], 'new@america.com')
+
     def test_user_exists(self):
         '''
         Test creating a user that already exists results in a failure
@@ -143,6 +161,16 @@ class PublicUserApiTests(TestCase):
         # test that 400 is sent back to the request
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+
+class PublicUserApiNoDbTests(SimpleTestCase):
+    '''
+    Test the users API (public) requests that are turned away before they
+    reach the database
+    '''
+
+    def setUp(self):
+        self.client = APIClient()
+
     def test_create_token_missing_field(self):
         '''
         test that email and password are required
@@ -172,15 +200,85 @@ class PrivateUserApiTests(TestCase):
     Test API requests that require authentication
     '''
 
-    # create authentication for each test that we do, which can be done once
-    # in the setUp, as this function gets ran prior to any tests
-    def setUp(self):
-        self.user = create_user(
+    # create the user once for the whole class, rather than hashing a new
+    # password before every test
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(
             email='test@america.com',
             password='testpassword',
             name='Test name'
         )
+
+    def setUp(self):
+        # cls.user is one object shared by every test of the class, so load
+        # a fresh copy of the row for each test to authenticate with
+        self.user = get_user_model().objects.get(pk=self.user.pk)
         # create re-usable client
         self.client = APIClient()
         # use the force authenticate method
         self.client.force_authenticate(user=self.user)
+
+    def test_retrieve_profile_success(self):
+        '''
+        Test retrieving profile for logged in user
+        '''
+        response = self.client.get(ME_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # the password is never shown
+        self.assertEqual(response.data, {
+            'name': self.user.name,
+            'email': self.user.email,
+        })
+
+    def test_update_user_profile(self):
+        '''
+        Test updating the user profile for authenticated user
+        '''
+        payload = {'name': 'new name', 'password': 'newpassword123'}
+        # simulate an http patch request to update the user
+        response = self.client.patch(ME_URL, payload)
+        # use the refresh from db function to update the user with the
+        # latest values from the db
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, payload['name'])
+        self.assertTrue(self.user.check_password(payload['password']))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class UserSerializerTests(TestCase):
+    '''
+    Test creating users through the serializer
+    '''
+
+    def test_create_many_users(self):
+        '''
+        Test creating a list of users saves them all with their passwords
+        '''
+        payload = [
+            {'email': 'One@America.com', 'password': 'testpass1', 'name': 'a'},
+            {'email': 'two@america.com', 'password': 'testpass2', 'name': 'b'},
+        ]
+        serializer = UserSerializer(data=payload, many=True)
+        self.assertTrue(serializer.is_valid())
+        # all of the users go into the database in one insert
+        with self.assertNumQueries(1):
+            serializer.save()
+
+        user = get_user_model().objects.get(email='one@america.com')
+        self.assertTrue(user.check_password('testpass1'))
+        self.assertEqual(get_user_model().objects.count(), 2)
+
+    def test_create_many_users_duplicate_email(self):
+        '''
+        Test the same email can't be used twice in one list
+        '''
+        payload = [
+            {'email': 'me@america.com', 'password': 'testpass1', 'name': 'a'},
+            {'email': 'ME@america.com', 'password': 'testpass2', 'name': 'b'},
+        ]
+        serializer = UserSerializer(data=payload, many=True)
+
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('non_field_errors', serializer.errors)
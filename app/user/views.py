@@ -1,4 +1,6 @@
-from user.serializers import UserSerializer, AuthTokenSerializer
+from user.serializers import (
+    UserSerializer, UserReadSerializer, AuthTokenSerializer
+)
 # this view comes with the django rest_framework, premade that allows us to
 # easily make an api that creates an object in a database using the serializer
 # that we are going to provide.
@@ -46,6 +48,10 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
     # authenticated to use the API (just logged in)
     authentication_classes = (authentication.TokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
+    # DRF creates a new instance of each of these classes on every request,
+    # but none of them keep any state, so create them once and share them
+    shared_authenticators = tuple(auth() for auth in authentication_classes)
+    shared_permissions = tuple(perm() for perm in permission_classes)
     # now add a get object function to our api view
     # we are going to override the getobject and return the authenticate user
 
@@ -59,3 +65,23 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
         # authenticated user and assigning it to a request.
         # (THIS IS PART OF THE DJANGO REST FRAMEWORK)
         return self.request.user
+
+    def get_authenticators(self):
+        '''
+        Return the shared authentication instances
+        '''
+        return self.shared_authenticators
+
+    def get_permissions(self):
+        '''
+        Return the shared permission instances
+        '''
+        return self.shared_permissions
+
+    def get_serializer_class(self):
+        '''
+        Return the read only serializer when the user is only being shown
+        '''
+        if self.request.method == 'GET':
+            return UserReadSerializer
+        return self.serializer_class